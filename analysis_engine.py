@@ -1,78 +1,173 @@
 # --- File: analysis_engine.py ---
 # Contains all the financial calculation and analysis logic.
 
-from textblob import TextBlob
+import csv
+import functools
+import math
+import os
 import re
+from collections import Counter
+from itertools import repeat
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+# The Loughran-McDonald Master Dictionary is licensed for individual research use, with
+# commercial use licensed separately, so it is not redistributed with this project.
+# Download the CSV from https://sraf.nd.edu/loughranmcdonald-master-dictionary/ and
+# point this environment variable at it. Without it, headlines are scored with VADER.
+LM_DICTIONARY_ENV = "LM_MASTER_DICTIONARY"
+
+# Word -> +1/-1, so scoring a token is a single hash lookup. Filled by load_lm_dictionary.
+_LM_POLARITY = {}
+_WORD_RE = re.compile(r"[a-z]+")
+_HTML_RE = re.compile(r"<[^>]+>")
+# Form 4 descriptions that indicate an insider purchase.
+_BUY_RE = re.compile(r"\b(?:purchase[ds]?|buys?|bought|acquired)\b", re.IGNORECASE)
+
+# Bound once so scoring a headline does no per-call attribute lookups.
+_tokenize = _WORD_RE.findall
+_strip_html = _HTML_RE.sub
+_polarity_of = _LM_POLARITY.get
+
+# VADER's lexicon ships with the package (MIT licensed) and is read once here, not on
+# the first request. Its compound score is labelled with the thresholds VADER recommends.
+_vader_compound = SentimentIntensityAnalyzer().polarity_scores
+VADER_THRESHOLD = 0.05
+
+# Static payloads, built once and shared by every request; treat them as read-only.
+MUNGER_CHECKLIST = (
+    {"bias": "Social Proof & Authority", "question": "Is the market's view driven by herd behavior or a few influential analysts?"},
+    {"bias": "Availability & Recency", "question": "Is a recent negative event being extrapolated indefinitely into the future?"},
+)
+PLACEHOLDER_CATALYSTS = (
+    {"id": "op1", "type": "Operational", "status": "pending", "evidence": "Potential for margin expansion if input costs normalize."},
+    {"id": "fin1", "type": "Financial", "status": "pending", "evidence": "Company has a history of opportunistic share repurchases."},
+)
+
+# Wire services repeat the same headline across tickers and days, so labels are
+# memoized process-wide and each distinct title is only ever scored once.
+@functools.lru_cache(maxsize=50_000)
+def _score_headline(text):
+    """Labels a headline Positive/Negative/Neutral by its net LM word count per token, or by VADER."""
+    if "<" in text:
+        text = _strip_html(" ", text)
+    if not _LM_POLARITY:
+        compound = _vader_compound(text)["compound"]
+        if compound >= VADER_THRESHOLD: return "Positive"
+        if compound <= -VADER_THRESHOLD: return "Negative"
+        return "Neutral"
+    tokens = _tokenize(text.lower())
+    # map() drives the lookups from C rather than a Python-level loop
+    net_count = sum(map(_polarity_of, tokens, repeat(0)))
+    pol = net_count / max(1, len(tokens))
+    if pol > 0.1: return "Positive"
+    if pol < -0.1: return "Negative"
+    return "Neutral"
+
+def _flagged(value):
+    # The dictionary marks a category with the year it was added; 0 (or a negative year
+    # for words later removed) means the word is not in the category.
+    try:
+        return int(value) > 0
+    except (TypeError, ValueError):
+        return False
+
+def load_lm_dictionary(path):
+    """Loads the positive and negative words from a Loughran-McDonald Master Dictionary CSV."""
+    polarity = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            if _flagged(row.get("Negative")):
+                polarity[row["Word"].lower()] = -1
+            elif _flagged(row.get("Positive")):
+                polarity[row["Word"].lower()] = 1
+    # Updated in place so the pre-bound _polarity_of lookup sees the new words.
+    _LM_POLARITY.clear()
+    _LM_POLARITY.update(polarity)
+    _score_headline.cache_clear()
+
+def sentiment_lexicon():
+    """Names the lexicon headlines are currently scored with."""
+    return "Loughran-McDonald" if _LM_POLARITY else "VADER"
+
+if os.getenv(LM_DICTIONARY_ENV):
+    load_lm_dictionary(os.getenv(LM_DICTIONARY_ENV))
 
 class AnalysisEngine:
 
-    def calculate_reclassified_cash_flow(self, income_statements, balance_sheets, cash_flow_statements):
-        """Calculates NOPAT, Net Investment, and Free Cash Flow."""
-        # This logic remains the same as in the previous version
+    def calculate_ebit_by_year(self, income_statements):
+        """Calculates EBIT (EBITDA less D&A) for each income statement year."""
+        ebit_by_year = {}
+        for inc in income_statements:
+            inc_get = inc.get
+            ebit_by_year[int(inc['calendarYear'])] = inc_get('ebitda', 0) - inc_get('depreciationAndAmortization', 0)
+        return ebit_by_year
+
+    def calculate_reclassified_cash_flow(self, income_statements, balance_sheets, cash_flow_statements, ebit_by_year=None):
+        """Calculates NOPAT, Net Investment, and Free Cash Flow. Pass ebit_by_year to reuse precomputed EBIT."""
+        if ebit_by_year is None:
+            ebit_by_year = self.calculate_ebit_by_year(income_statements)
+        income_map = {int(item['calendarYear']): item for item in income_statements}
+        balance_map = {int(item['calendarYear']): item for item in balance_sheets}
+        cash_flow_map = {int(item['calendarYear']): item for item in cash_flow_statements}
+
+        # Derive each per-year quantity once, column by column, so a year's operating
+        # working capital is reused as the following year's prior instead of recomputed.
+        nopat_by_year = {}
+        for year, inc in income_map.items():
+            inc_get = inc.get
+            ebit = ebit_by_year[year]
+            income_before_tax = inc_get('incomeBeforeTax')
+            tax_rate = inc_get('incomeTaxExpense', 0) / income_before_tax if income_before_tax else 0
+            nopat_by_year[year] = ebit * (1 - tax_rate)
+        op_wc_by_year = {}
+        for year, bs in balance_map.items():
+            bs_get = bs.get
+            op_wc_by_year[year] = (bs_get('netReceivables', 0) + bs_get('inventory', 0)) - bs_get('accountPayables', 0)
+
         analysis_results = []
-        income_map = {item['calendarYear']: item for item in income_statements}
-        balance_map = {item['calendarYear']: item for item in balance_sheets}
-        cash_flow_map = {item['calendarYear']: item for item in cash_flow_statements}
-        sorted_years = sorted(balance_map.keys(), reverse=True)
-
-        for i, year_str in enumerate(sorted_years):
-            if i >= len(sorted_years) - 1: continue
-            current_year, prior_year_str = int(year_str), str(int(year_str) - 1)
-            if not all(k in income_map and k in balance_map and k in cash_flow_map for k in [year_str, prior_year_str]):
+        for year in sorted(balance_map, reverse=True):
+            prior_year = year - 1
+            if not (prior_year in balance_map and year in income_map and prior_year in income_map
+                    and year in cash_flow_map and prior_year in cash_flow_map):
                 continue
 
-            inc = income_map[year_str]
-            bs_curr, bs_prior = balance_map[year_str], balance_map[prior_year_str]
-            
-            ebit = inc.get('ebitda', 0) - inc.get('depreciationAndAmortization', 0)
-            tax_rate = inc.get('incomeTaxExpense', 0) / inc.get('incomeBeforeTax', 1) if inc.get('incomeBeforeTax') else 0
-            nopat = ebit * (1 - tax_rate)
-
-            op_wc_curr = (bs_curr.get('netReceivables', 0) + bs_curr.get('inventory', 0)) - bs_curr.get('accountPayables', 0)
-            op_wc_prior = (bs_prior.get('netReceivables', 0) + bs_prior.get('inventory', 0)) - bs_prior.get('accountPayables', 0)
-            change_in_op_wc = op_wc_curr - op_wc_prior
-            capex = -cash_flow_map[year_str].get('capitalExpenditure', 0)
+            change_in_op_wc = op_wc_by_year[year] - op_wc_by_year[prior_year]
+            capex = -cash_flow_map[year].get('capitalExpenditure', 0)
             net_investment = change_in_op_wc + capex
+            nopat = nopat_by_year[year]
             free_cash_flow = nopat - net_investment
-            
+
             analysis_results.append({
-                "year": current_year, "nopat": round(nopat),
+                "year": year, "nopat": round(nopat),
                 "netInvestment": round(net_investment), "freeCashFlow": round(free_cash_flow),
             })
         return analysis_results
 
     def analyze_sentiment(self, news_articles):
-        """Performs basic sentiment analysis on news headlines."""
-        # This logic remains the same
-        sentiments, pos, neg, neu = [], 0, 0, 0
+        """Scores news headlines against the Loughran-McDonald word lists, or with VADER if they are not loaded."""
+        sentiments = []
         for article in news_articles:
-            text, blob = article.get('title', ''), TextBlob(text)
-            pol = blob.sentiment.polarity
-            if pol > 0.1: sentiment_label, pos = "Positive", pos + 1
-            elif pol < -0.1: sentiment_label, neg = "Negative", neg + 1
-            else: sentiment_label, neu = "Neutral", neu + 1
-            sentiments.append({"text": text, "url": article.get('url'), "sentiment_label": sentiment_label})
-        summary = {"positive_count": pos, "negative_count": neg, "neutral_count": neu, "total_articles": len(news_articles)}
-        return {"summary": summary, "articles": sentiments[:10]} # Return top 10 for UI
+            text = article.get('title') or ''
+            sentiments.append({"text": text, "url": article.get('url'), "sentiment_label": _score_headline(text)})
+        counts = Counter(s["sentiment_label"] for s in sentiments)
+        summary = {
+            "positive_count": counts["Positive"], "negative_count": counts["Negative"],
+            "neutral_count": counts["Neutral"], "total_articles": len(news_articles)
+        }
+        return {"summary": summary, "lexicon": sentiment_lexicon(), "articles": sentiments[:10]} # Return top 10 for UI
 
     def get_munger_checklist(self):
         """Returns a static Munger-inspired psychological checklist."""
-        # This logic remains the same
-        return [
-            {"bias": "Social Proof & Authority", "question": "Is the market's view driven by herd behavior or a few influential analysts?"},
-            {"bias": "Availability & Recency", "question": "Is a recent negative event being extrapolated indefinitely into the future?"},
-        ]
-
-    def calculate_valuation_metrics(self, reclassified_cash_flow, enterprise_value_data, income_statements):
-        """Calculates FCF Yield and a simple EPV."""
-        # This logic remains the same
+        return MUNGER_CHECKLIST
+
+    def calculate_valuation_metrics(self, reclassified_cash_flow, enterprise_value_data, ebit_values):
+        """Calculates FCF Yield and a simple EPV from the yearly EBIT values."""
         fcf_yield = 0
         latest_fcf = reclassified_cash_flow[0].get('freeCashFlow') if reclassified_cash_flow else 0
         enterprise_value = enterprise_value_data.get('enterpriseValue') if enterprise_value_data else 0
         if enterprise_value > 0: fcf_yield = (latest_fcf / enterprise_value) * 100
 
-        ebit_values = [inc.get('ebitda', 0) - inc.get('depreciationAndAmortization', 0) for inc in income_statements]
-        normalized_ebit = sum(ebit_values) / len(ebit_values) if ebit_values else 0
+        normalized_ebit = math.fsum(ebit_values) / len(ebit_values) if ebit_values else 0.0
         cost_of_capital = 0.10
         epv_firm = normalized_ebit / cost_of_capital if cost_of_capital > 0 else 0
         net_debt = enterprise_value_data.get('addTotalDebt', 0) - enterprise_value_data.get('minusCashAndCashEquivalents', 0)
@@ -102,17 +197,19 @@ class AnalysisEngine:
             # Form 4 transaction codes: 'P' for Purchase, 'S' for Sale
             # We only care about open market buys.
             # This is a simplification; a real implementation would parse the XML filing.
-            # For now, we look for a 'P' in the description.
-            description = f.get('description', '')
-            if 'purchase' in description.lower() or 'buy' in description.lower():
-                 guideposts.append({
+            # For now, _BUY_RE looks for the whole words purchase/purchased/purchases, buy/buys,
+            # bought or acquired in the description. Unlike the earlier substring test,
+            # "buying" and "buyback" (and "repurchase") no longer count as a purchase.
+            description = f.get('description') or ''
+            if _BUY_RE.search(description):
+                filed_at = f.get('filedAt', 'N/A')
+                guideposts.append({
                     "id": f.get("id"), "type": "Insider", "status": "pending",
-                    "evidence": f"Insider transaction (purchase) reported on {f.get('filedAt', 'N/A')}. [View Filing]",
+                    "evidence": f"Insider transaction (purchase) reported on {filed_at}. [View Filing]",
                     "link": f.get('linkToFilingDetails', '#')
                 })
 
         # Add some placeholder operational catalysts
-        guideposts.append({"id": "op1", "type": "Operational", "status": "pending", "evidence": "Potential for margin expansion if input costs normalize."})
-        guideposts.append({"id": "fin1", "type": "Financial", "status": "pending", "evidence": "Company has a history of opportunistic share repurchases."})
+        guideposts.extend(PLACEHOLDER_CATALYSTS)
 
         return guideposts
\ No newline at end of file
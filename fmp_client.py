@@ -1,28 +1,62 @@
 # --- File: fmp_client.py ---
 # Handles all communication with the Financial Modeling Prep API.
 
-import requests
+import asyncio
+import httpx
+from cachetools import TLRUCache
+from http_session import fetch_json
+
+# How long (in seconds) a response stays cached, by endpoint family.
+# Statements only change quarterly, while quotes move minute by minute.
+DEFAULT_TTL = 3600
+TTL_OVERRIDES = {
+    "income-statement": 86400,
+    "balance-sheet-statement": 86400,
+    "cash-flow-statement": 86400,
+    "quote": 30,
+    "stock_news": 300,
+}
 
 class FmpApiClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, ttl_overrides=None):
         self.api_key = api_key
         self.base_url = "https://financialmodelingprep.com/api/v3"
+        self.ttl_overrides = {**TTL_OVERRIDES, **(ttl_overrides or {})}
+        self._cache = TLRUCache(maxsize=2048, ttu=self._time_to_use)
+
+    def _time_to_use(self, key, value, now):
+        family = key[0].split("/", 1)[0]
+        return now + self.ttl_overrides.get(family, DEFAULT_TTL)
+
+    def cache_clear(self):
+        """Drops all cached responses."""
+        self._cache.clear()
 
-    def _make_request(self, endpoint):
-        """Generic request helper."""
+    async def _make_request(self, session, path, params=None):
+        """Generic request helper. Successful responses are cached per path and query parameters."""
+        params = dict(params or {})
+        key = (path, tuple(sorted(params.items())))
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
         try:
-            url = f"{self.base_url}/{endpoint}&apikey={self.api_key}"
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"FMP API request failed for endpoint {endpoint}: {e}")
+            params["apikey"] = self.api_key
+            data = await fetch_json(session, "GET", f"{self.base_url}/{path}", params=params)
+        except (httpx.HTTPError, ValueError) as e: # ValueError: body was not valid JSON
+            print(f"FMP API request failed for endpoint {path}: {e}")
             return None
+        # Empty payloads are often transient (e.g. a partial FMP response), so only
+        # non-empty data is cached; otherwise one bad reply would stick for the full TTL.
+        if data:
+            self._cache[key] = data
+        return data
 
-    def get_financial_data(self, ticker, period="annual", limit=10):
-        income_statement = self._make_request(f"income-statement/{ticker}?period={period}&limit={limit}")
-        balance_sheet = self._make_request(f"balance-sheet-statement/{ticker}?period={period}&limit={limit}")
-        cash_flow_statement = self._make_request(f"cash-flow-statement/{ticker}?period={period}&limit={limit}")
+    async def get_financial_data(self, session, ticker, period="annual", limit=10):
+        income_statement, balance_sheet, cash_flow_statement = await asyncio.gather(
+            self._make_request(session, f"income-statement/{ticker}", {"period": period, "limit": limit}),
+            self._make_request(session, f"balance-sheet-statement/{ticker}", {"period": period, "limit": limit}),
+            self._make_request(session, f"cash-flow-statement/{ticker}", {"period": period, "limit": limit})
+        )
 
         if not all([income_statement, balance_sheet, cash_flow_statement]):
             return {"error": f"Failed to retrieve complete financial data for {ticker} from FMP."}
@@ -33,18 +67,20 @@ class FmpApiClient:
             "cash_flow_statement": cash_flow_statement
         }
 
-    def get_key_metrics(self, ticker, period="annual", limit=10):
-        return self._make_request(f"key-metrics/{ticker}?period={period}&limit={limit}") or []
+    async def get_key_metrics(self, session, ticker, period="annual", limit=10):
+        return await self._make_request(session, f"key-metrics/{ticker}", {"period": period, "limit": limit}) or []
 
-    def get_profile_and_quote(self, ticker):
-        profile = self._make_request(f"profile/{ticker}?")
-        quote = self._make_request(f"quote/{ticker}?")
-        enterprise_values = self._make_request(f"enterprise-values/{ticker}?period=annual&limit=1")
+    async def get_profile_and_quote(self, session, ticker):
+        profile, quote, enterprise_values = await asyncio.gather(
+            self._make_request(session, f"profile/{ticker}"),
+            self._make_request(session, f"quote/{ticker}"),
+            self._make_request(session, f"enterprise-values/{ticker}", {"period": "annual", "limit": 1})
+        )
         return {
             "profile": profile[0] if profile else {},
             "quote": quote[0] if quote else {},
             "enterprise_value": enterprise_values[0] if enterprise_values else {}
         }
 
-    def get_news(self, ticker, limit=50):
-        return self._make_request(f"stock_news?tickers={ticker}&limit={limit}") or []
\ No newline at end of file
+    async def get_news(self, session, ticker, limit=50):
+        return await self._make_request(session, "stock_news", {"tickers": ticker, "limit": limit}) or []
\ No newline at end of file
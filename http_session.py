@@ -0,0 +1,33 @@
+# --- File: http_session.py ---
+# Shared httpx client setup and request helper used by the API clients.
+
+import asyncio
+import httpx
+import orjson
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def create_session():
+    """Creates the pooled HTTP/2 client the API clients send their requests through."""
+    # Concurrent requests to the same host are multiplexed over one HTTP/2 connection.
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(10.0, connect=3.0),
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    )
+
+async def fetch_json(session, method, url, retries=3, backoff_factor=0.3, **kwargs):
+    """Sends a request and returns the decoded JSON body, retrying rate limits, server errors and failed connections."""
+    for attempt in range(retries + 1):
+        try:
+            response = await session.request(method, url, **kwargs)
+        except (httpx.NetworkError, httpx.ConnectTimeout):
+            if attempt == retries: raise
+            await asyncio.sleep(backoff_factor * (2 ** attempt))
+            continue
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            await asyncio.sleep(backoff_factor * (2 ** attempt))
+            continue
+        response.raise_for_status()
+        # Decode the raw bytes with orjson rather than going through text + stdlib json.
+        return orjson.loads(response.content) if response.content else None
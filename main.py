@@ -1,22 +1,66 @@
 # --- File: main.py ---
-# This file contains the Flask application that serves as the backend API
+# This file contains the Quart application that serves as the backend API
 # for the Mispricing Detective tool. It orchestrates data fetching and analysis.
 
-from flask import Flask, jsonify
-from flask_cors import CORS
+from quart import Quart, jsonify, request
+from quart.json.provider import JSONProvider
+from quart_cors import cors
 import os
+import gzip
+import asyncio
+import orjson
+from http_session import create_session
 from sec_client import SecApiClient
 from fmp_client import FmpApiClient
-from analysis_engine import AnalysisEngine
+from analysis_engine import AnalysisEngine, LM_DICTIONARY_ENV, sentiment_lexicon
 
 # --- Configuration ---
 # Use environment variables for API keys for security.
 FMP_API_KEY = os.getenv("FMP_API_KEY", "YOUR_FMP_API_KEY") 
 SEC_API_KEY = os.getenv("SEC_API_KEY", "758e5d6bc84238feaa6b6f070c3604e11e277a53016ae0af6af152e844b1d8ea")
 
-# --- Flask App Initialization ---
-app = Flask(__name__)
-CORS(app) # Allows the React frontend to make requests to this server
+# --- JSON Serialization ---
+class OrjsonProvider(JSONProvider):
+    """Encodes responses with orjson, which is much faster than the stdlib json module."""
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand the encoded bytes straight to the response instead of round-tripping through str.
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.option), mimetype="application/json")
+
+# --- Quart App Initialization ---
+# Quart is Flask's asyncio-native counterpart, so the analyze endpoint awaits the API clients directly.
+app = cors(Quart(__name__)) # CORS allows the React frontend to make requests to this server
+app.json = OrjsonProvider(app)
+
+# --- Response Compression ---
+COMPRESS_MIN_SIZE = 500
+
+@app.after_request
+async def gzip_response(response):
+    """Gzips JSON responses (the analysis payload is large) for clients that accept it."""
+    if response.mimetype != "application/json" or "Content-Encoding" in response.headers:
+        return response
+    data = await response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    # From here the encoding depends on the request, so shared caches must key on it.
+    response.vary.add("Accept-Encoding")
+    # accept_encodings honours q-values, so "gzip;q=0" counts as a refusal.
+    if not request.accept_encodings["gzip"]:
+        return response
+    # Compressing a large payload takes milliseconds; doing it in a thread keeps the
+    # event loop free for the other analyses in flight on this worker.
+    response.set_data(await asyncio.to_thread(gzip.compress, data, 6))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
 
 # --- Service Initialization ---
 # Initialize our data clients and analysis engine
@@ -24,9 +68,42 @@ sec_client = SecApiClient(SEC_API_KEY)
 fmp_client = FmpApiClient(FMP_API_KEY)
 analysis_engine = AnalysisEngine()
 
+# Every request runs on the worker's single event loop, so one pooled HTTP client
+# is opened at startup and shared by all analyses. The clients' response caches rely on
+# the same property: they are only touched from this loop, so they need no locking.
+http_client = None
+
+@app.before_serving
+async def open_http_client():
+    global http_client
+    http_client = create_session()
+
+@app.before_serving
+async def log_sentiment_lexicon():
+    if sentiment_lexicon() != "Loughran-McDonald":
+        app.logger.warning("%s is not set; scoring news sentiment with VADER instead of Loughran-McDonald.", LM_DICTIONARY_ENV)
+
+@app.after_serving
+async def close_http_client():
+    await http_client.aclose()
+
+# --- Data Source Fallbacks ---
+# Only the financial statements are required. Any other source that fails falls back
+# to an empty value of the same shape so the remaining pillars still render.
+SOURCE_DEFAULTS = {
+    "metrics": list,
+    "profile_data": lambda: {"profile": {}, "quote": {}, "enterprise_value": {}},
+    "news": list,
+    "filings": dict,
+}
+
+def _source_failed(result):
+    """True if a gathered data source raised or returned an error payload."""
+    return isinstance(result, Exception) or (isinstance(result, dict) and "error" in result)
+
 # --- Main API Endpoint ---
 @app.route('/analyze/<string:ticker>', methods=['GET'])
-def analyze_ticker(ticker):
+async def analyze_ticker(ticker):
     """
     This is the main endpoint for the application. It aggregates all necessary
     data for a given ticker and organizes it into the Four-Pillar structure.
@@ -38,27 +115,43 @@ def analyze_ticker(ticker):
     
     try:
         # --- Phase 1: Data Aggregation ---
-        # Fetch data from both our API clients
-        financials = fmp_client.get_financial_data(ticker)
+        # Fetch data from both our API clients concurrently over the shared session.
+        # Results are keyed by the same names as the coroutines, so they cannot drift apart.
+        fetches = {
+            "financials": fmp_client.get_financial_data(http_client, ticker),
+            "metrics": fmp_client.get_key_metrics(http_client, ticker),
+            "profile_data": fmp_client.get_profile_and_quote(http_client, ticker),
+            "news": fmp_client.get_news(http_client, ticker),
+            "filings": sec_client.get_latest_filings(http_client, ticker),
+        }
+        sources = dict(zip(fetches, await asyncio.gather(*fetches.values(), return_exceptions=True)))
+
+        financials = sources["financials"]
+        if isinstance(financials, Exception):
+            financials = {"error": f"Failed to retrieve financial data for {ticker}: {financials}"}
         if "error" in financials: return jsonify(financials), 500
-        
-        metrics = fmp_client.get_key_metrics(ticker)
-        profile_data = fmp_client.get_profile_and_quote(ticker)
-        news = fmp_client.get_news(ticker)
-        filings = sec_client.get_latest_filings(ticker)
-        
+
+        for name, default in SOURCE_DEFAULTS.items():
+            if _source_failed(sources[name]):
+                print(f"Data source '{name}' unavailable for ticker {ticker}: {sources[name]}")
+                sources[name] = default()
+        metrics, profile_data = sources["metrics"], sources["profile_data"]
+        news, filings = sources["news"], sources["filings"]
+
         # --- Phase 2: Analysis ---
         # Perform calculations using the analysis engine
+        ebit_by_year = analysis_engine.calculate_ebit_by_year(financials.get("income_statement", []))
         reclassified_cash_flow = analysis_engine.calculate_reclassified_cash_flow(
             financials.get("income_statement", []),
             financials.get("balance_sheet", []),
-            financials.get("cash_flow_statement", [])
+            financials.get("cash_flow_statement", []),
+            ebit_by_year
         )
         news_sentiment = analysis_engine.analyze_sentiment(news)
         valuation_analysis = analysis_engine.calculate_valuation_metrics(
             reclassified_cash_flow,
             profile_data.get("enterprise_value", {}),
-            financials.get("income_statement", [])
+            list(ebit_by_year.values())
         )
         catalyst_guideposts = analysis_engine.find_catalysts(filings)
 
@@ -69,8 +162,8 @@ def analyze_ticker(ticker):
             "key_metrics": metrics,
             "company_profile": profile_data.get("profile", {}),
             "sec_filings": {
-                "10-K": filings.get("10-K", [{}])[0].get("link", "#"),
-                "10-Q": filings.get("10-Q", [{}])[0].get("link", "#"),
+                "10-K": (filings.get("10-K") or [{}])[0].get("link", "#"),
+                "10-Q": (filings.get("10-Q") or [{}])[0].get("link", "#"),
             }
         }
         pillar2_data = {
@@ -103,27 +196,38 @@ def analyze_ticker(ticker):
 
 # --- How to Run This Backend ---
 # 1. Create a project folder. Inside it, create these files:
-#    main.py, fmp_client.py, sec_client.py, analysis_engine.py, requirements.txt
+#    main.py, fmp_client.py, sec_client.py, http_session.py, analysis_engine.py, requirements.txt
 #
 # 2. Populate requirements.txt with:
-#    Flask
-#    Flask-Cors
-#    requests
-#    textblob
+#    quart
+#    quart-cors
+#    httpx[http2]
+#    cachetools
+#    orjson
+#    vaderSentiment
+#    hypercorn
+#    uvloop; sys_platform != "win32"
 #
 # 3. Install dependencies:
 #    pip install -r requirements.txt
 #
-# 4. Download NLP corpus for TextBlob:
-#    python -m textblob.download_corpora
-#
-# 5. Set your FMP API key (the SEC key is already in the code):
+# 4. Set your FMP API key (the SEC key is already in the code):
 #    export FMP_API_KEY='your_financial_modeling_prep_api_key'
 #
-# 6. Run the server:
-#    flask --app main run
+#    News sentiment uses the Loughran-McDonald Master Dictionary, which is not bundled
+#    (see its license terms). Download the CSV and point the backend at it:
+#    export LM_MASTER_DICTIONARY='/path/to/Loughran-McDonald_MasterDictionary.csv'
+#    Without it, headlines are scored with VADER.
+#
+# 5. Run the server:
+#    quart --app main run
+#
+#    For production, serve it with hypercorn on uvloop. Each worker is a single
+#    event loop that handles many concurrent analyses:
+#    hypercorn --bind 0.0.0.0:5000 --worker-class uvloop --workers $(nproc) main:app
+#    uvloop is POSIX-only; on Windows, drop --worker-class to use the default asyncio workers.
 #
 # The backend will now be running on http://127.0.0.1:5000
 #
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    app.run(debug=os.getenv("QUART_DEBUG") == "1", port=5000)
\ No newline at end of file
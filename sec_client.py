@@ -1,33 +1,72 @@
 # --- File: sec_client.py ---
 # Handles all communication with the sec-api.io API.
 
-import requests
+import asyncio
+import httpx
+from cachetools import TTLCache
+from http_session import fetch_json
+
+FORM_TYPES = ("10-K", "10-Q", "4", "SC 13D")
+FILINGS_PER_TICKER = 20
 
 class SecApiClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, ttl=300):
         self.api_key = api_key
         self.base_url = "https://api.sec-api.io"
+        # New Form 4s can land during the day, so filings are only cached briefly.
+        self._cache = TTLCache(maxsize=512, ttl=ttl)
+
+    def cache_clear(self):
+        """Drops all cached filings."""
+        self._cache.clear()
 
-    def get_latest_filings(self, ticker):
+    async def get_latest_filings(self, session, ticker):
         """Fetches latest 10-K, 10-Q, Form 4, and 13D filings."""
+        filings = await self.get_latest_filings_batch(session, [ticker])
+        return filings.get(ticker, {})
+
+    async def get_latest_filings_batch(self, session, tickers):
+        """Fetches latest filings for several tickers concurrently, keyed by ticker."""
+        results = {}
+        for ticker in tickers:
+            cached = self._cache.get(ticker)
+            if cached is not None:
+                results[ticker] = cached
+        missing = [ticker for ticker in dict.fromkeys(tickers) if ticker not in results]
+
+        # One query per ticker: a shared query sorted by filedAt would let a ticker with many
+        # Form 4s fill the whole page and crowd the others out.
+        fetched = await asyncio.gather(*(self._query_filings(session, ticker) for ticker in missing))
+        for ticker, organized_filings in zip(missing, fetched):
+            if organized_filings:
+                results[ticker] = organized_filings
+        return results
+
+    async def _query_filings(self, session, ticker):
         query = {
             "query": { "query_string": { "query": f"ticker:{ticker} AND (formType:\"10-K\" OR formType:\"10-Q\" OR formType:\"4\" OR formType:\"SC 13D\")" }},
             "from": "0",
-            "size": "20",
+            "size": str(FILINGS_PER_TICKER),
             "sort": [{ "filedAt": { "order": "desc" }}]
         }
         try:
-            response = requests.post(f"{self.base_url}?token={self.api_key}", json=query)
-            response.raise_for_status()
-            filings = response.json().get('filings', [])
-            
-            # Organize filings by form type
-            organized_filings = {"10-K": [], "10-Q": [], "4": [], "SC 13D": []}
+            response = await fetch_json(session, "POST", f"{self.base_url}?token={self.api_key}", json=query)
+            if not isinstance(response, dict):
+                # An empty or malformed body is a failed request, not a ticker without
+                # filings, so it must not be cached for the full TTL.
+                print(f"SEC API returned no filings payload for {ticker}")
+                return {}
+            filings = response.get('filings', ())
+
+            # Organize filings by form type in a single pass over pre-bound appends
+            organized_filings = {form_type: [] for form_type in FORM_TYPES}
+            appenders = {form_type: bucket.append for form_type, bucket in organized_filings.items()}
             for f in filings:
-                form_type = f.get('formType')
-                if form_type in organized_filings:
-                    organized_filings[form_type].append(f)
+                append = appenders.get(f.get('formType'))
+                if append is not None:
+                    append(f)
+            self._cache[ticker] = organized_filings
             return organized_filings
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e: # ValueError: body was not valid JSON
             print(f"SEC API request failed: {e}")
             return {}
\ No newline at end of file
@@ -0,0 +1,156 @@
+import random
+
+import pytest
+
+import analysis_engine
+from analysis_engine import AnalysisEngine, _score_headline, load_lm_dictionary, sentiment_lexicon
+
+# A handful of rows in the Master Dictionary's CSV layout: categories hold the year a
+# word was added, 0 when absent and a negative year when the word was later removed.
+SAMPLE_DICTIONARY = """Word,Negative,Positive
+STRONG,0,2009
+GAINS,0,2009
+LOSS,2009,0
+LAWSUIT,2009,0
+WITHDRAWN,-2020,0
+"""
+
+
+@pytest.fixture
+def no_lm_dictionary():
+    # Restores whatever LM_MASTER_DICTIONARY loaded at import once the test is done.
+    saved = dict(analysis_engine._LM_POLARITY)
+    analysis_engine._LM_POLARITY.clear()
+    _score_headline.cache_clear()
+    yield
+    analysis_engine._LM_POLARITY.clear()
+    analysis_engine._LM_POLARITY.update(saved)
+    _score_headline.cache_clear()
+
+
+@pytest.fixture
+def lm_dictionary(no_lm_dictionary, tmp_path):
+    path = tmp_path / "lm_sample.csv"
+    path.write_text(SAMPLE_DICTIONARY, encoding="utf-8")
+    load_lm_dictionary(str(path))
+
+
+def _baseline_reclassified_cash_flow(income_statements, balance_sheets, cash_flow_statements):
+    # The original implementation, kept as the reference the optimized version must match.
+    analysis_results = []
+    income_map = {item['calendarYear']: item for item in income_statements}
+    balance_map = {item['calendarYear']: item for item in balance_sheets}
+    cash_flow_map = {item['calendarYear']: item for item in cash_flow_statements}
+    sorted_years = sorted(balance_map.keys(), reverse=True)
+    for i, year_str in enumerate(sorted_years):
+        if i >= len(sorted_years) - 1: continue
+        current_year, prior_year_str = int(year_str), str(int(year_str) - 1)
+        if not all(k in income_map and k in balance_map and k in cash_flow_map for k in [year_str, prior_year_str]):
+            continue
+        inc = income_map[year_str]
+        bs_curr, bs_prior = balance_map[year_str], balance_map[prior_year_str]
+        ebit = inc.get('ebitda', 0) - inc.get('depreciationAndAmortization', 0)
+        tax_rate = inc.get('incomeTaxExpense', 0) / inc.get('incomeBeforeTax', 1) if inc.get('incomeBeforeTax') else 0
+        nopat = ebit * (1 - tax_rate)
+        op_wc_curr = (bs_curr.get('netReceivables', 0) + bs_curr.get('inventory', 0)) - bs_curr.get('accountPayables', 0)
+        op_wc_prior = (bs_prior.get('netReceivables', 0) + bs_prior.get('inventory', 0)) - bs_prior.get('accountPayables', 0)
+        net_investment = (op_wc_curr - op_wc_prior) - cash_flow_map[year_str].get('capitalExpenditure', 0)
+        analysis_results.append({
+            "year": current_year, "nopat": round(nopat),
+            "netInvestment": round(net_investment), "freeCashFlow": round(nopat - net_investment),
+        })
+    return analysis_results
+
+
+def test_score_headline_uses_lm_word_lists(lm_dictionary):
+    assert sentiment_lexicon() == "Loughran-McDonald"
+    assert _score_headline("Strong gains") == "Positive"
+    assert _score_headline("Lawsuit loss") == "Negative"
+    assert _score_headline("Company announces event") == "Neutral"
+
+
+def test_score_headline_ignores_removed_words(lm_dictionary):
+    assert _score_headline("Offer withdrawn") == "Neutral"
+
+
+def test_score_headline_thresholds_are_strict(lm_dictionary):
+    # One positive word in ten tokens is exactly +0.1, which is not above the threshold.
+    assert _score_headline("strong " + "word " * 9) == "Neutral"
+    assert _score_headline("strong " + "word " * 8) == "Positive"
+    assert _score_headline("loss " + "word " * 9) == "Neutral"
+    assert _score_headline("loss " + "word " * 8) == "Negative"
+
+
+def test_score_headline_strips_html(lm_dictionary):
+    # Left in, the tag's attribute tokens would dilute the score below the threshold.
+    assert _score_headline('<div data-a data-b data-c data-d data-e>Strong</div>') == "Positive"
+
+
+def test_score_headline_falls_back_to_vader(no_lm_dictionary):
+    assert sentiment_lexicon() == "VADER"
+    assert _score_headline("Strong gains") == "Positive"
+    assert _score_headline("Lawsuit loss") == "Negative"
+    assert _score_headline("Company announces event") == "Neutral"
+    # VADER does not see through markup, so tags are stripped for it too.
+    assert _score_headline("<b>Great</b> quarter") == "Positive"
+
+
+def test_analyze_sentiment_handles_missing_titles(lm_dictionary):
+    result = AnalysisEngine().analyze_sentiment([{"title": None}, {}, {"title": "Strong gains", "url": "u"}])
+    assert result["summary"] == {"positive_count": 1, "negative_count": 0, "neutral_count": 2, "total_articles": 3}
+    assert result["lexicon"] == "Loughran-McDonald"
+    assert [a["text"] for a in result["articles"]] == ["", "", "Strong gains"]
+
+
+def test_reclassified_cash_flow_skips_years_without_a_prior():
+    income = [{"calendarYear": y, "ebitda": 500, "depreciationAndAmortization": 100,
+               "incomeTaxExpense": 80, "incomeBeforeTax": 400} for y in ("2024", "2023", "2022", "2020")]
+    balance = [{"calendarYear": y, "netReceivables": r, "inventory": 50, "accountPayables": 30}
+               for y, r in (("2024", 120), ("2023", 100), ("2022", 90), ("2021", 80), ("2020", 70))]
+    cash_flow = [{"calendarYear": y, "capitalExpenditure": -40} for y in ("2024", "2023", "2022", "2021", "2020")]
+
+    result = AnalysisEngine().calculate_reclassified_cash_flow(income, balance, cash_flow)
+
+    # 2022 has no 2021 income statement and 2020 has no prior year at all.
+    assert result == [
+        {"year": 2024, "nopat": 320, "netInvestment": 60, "freeCashFlow": 260},
+        {"year": 2023, "nopat": 320, "netInvestment": 50, "freeCashFlow": 270},
+    ]
+    assert result == _baseline_reclassified_cash_flow(income, balance, cash_flow)
+
+
+def test_reclassified_cash_flow_matches_baseline_on_gappy_data():
+    rng = random.Random(7)
+    engine = AnalysisEngine()
+    for _ in range(500):
+        def years():
+            return [str(y) for y in range(2024, 2012, -1) if rng.random() < 0.85]
+        value = lambda: rng.randint(-500, 1000)
+        income = [{"calendarYear": y, "ebitda": value(), "depreciationAndAmortization": value(),
+                   "incomeTaxExpense": value(), "incomeBeforeTax": rng.choice([0, value()])} for y in years()]
+        balance = [{"calendarYear": y, "netReceivables": value(), "inventory": value(),
+                    "accountPayables": value()} for y in years()]
+        cash_flow = [{"calendarYear": y, "capitalExpenditure": value()} for y in years()]
+
+        assert engine.calculate_reclassified_cash_flow(income, balance, cash_flow) == \
+            _baseline_reclassified_cash_flow(income, balance, cash_flow)
+
+
+@pytest.mark.parametrize("description", [
+    "Purchase of common stock", "Shares purchased", "Director buys shares",
+    "Officer bought 1,000 shares", "Stock ACQUIRED in open market", "Open market buy",
+])
+def test_find_catalysts_flags_insider_purchases(description):
+    filings = {"4": [{"id": "f4", "description": description, "filedAt": "2024-05-01"}]}
+    guideposts = AnalysisEngine().find_catalysts(filings)
+    assert [g["type"] for g in guideposts[:-2]] == ["Insider"]
+
+
+@pytest.mark.parametrize("description", [
+    "Insider buying program", "Share buyback plan", "Stock repurchase", "Sale of common stock", "", None,
+])
+def test_find_catalysts_ignores_non_purchases(description):
+    # Whole-word matches only: the old substring test counted "buying", "buyback" and "repurchase".
+    filings = {"4": [{"id": "f4", "description": description}]}
+    guideposts = AnalysisEngine().find_catalysts(filings)
+    assert [g["id"] for g in guideposts] == ["op1", "fin1"]
@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+from cachetools import TLRUCache
+
+from fmp_client import DEFAULT_TTL, FmpApiClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def _client_with_clock():
+    client = FmpApiClient("key")
+    clock = FakeClock()
+    client._cache = TLRUCache(maxsize=2048, ttu=client._time_to_use, timer=clock)
+    return client, clock
+
+
+def _request(client, handler, *requests):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            return [await client._make_request(session, path, params) for path, params in requests]
+    return asyncio.run(run())
+
+
+def test_ttl_depends_on_endpoint_family():
+    client = FmpApiClient("key", ttl_overrides={"profile": 60})
+    assert client._time_to_use(("income-statement/AAPL", ()), None, 100) == 100 + 86400
+    assert client._time_to_use(("quote/AAPL", ()), None, 100) == 130
+    assert client._time_to_use(("stock_news", ()), None, 100) == 400
+    assert client._time_to_use(("profile/AAPL", ()), None, 100) == 160
+    assert client._time_to_use(("key-metrics/AAPL", ()), None, 100) == 100 + DEFAULT_TTL
+
+
+def test_responses_are_cached_until_their_family_expires():
+    client, clock = _client_with_clock()
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path.rsplit("/", 2)[-2])
+        return httpx.Response(200, json=[{"price": len(requested)}])
+
+    _request(client, handler, ("quote/AAPL", None), ("income-statement/AAPL", {"limit": 10}))
+    clock.now = 29
+    _request(client, handler, ("quote/AAPL", None), ("income-statement/AAPL", {"limit": 10}))
+    assert requested == ["quote", "income-statement"]
+
+    # The quote expires after 30 seconds; the statement is still served from the cache.
+    clock.now = 31
+    _request(client, handler, ("quote/AAPL", None), ("income-statement/AAPL", {"limit": 10}))
+    assert requested == ["quote", "income-statement", "quote"]
+
+
+def test_cache_key_covers_params_but_not_the_api_key():
+    client = FmpApiClient("key")
+    seen = []
+
+    def handler(request):
+        seen.append(dict(request.url.params))
+        return httpx.Response(200, json=[1])
+
+    _request(client, handler, ("key-metrics/AAPL", {"limit": 10}), ("key-metrics/AAPL", {"limit": 10}),
+             ("key-metrics/AAPL", {"limit": 5}))
+    assert seen == [{"limit": "10", "apikey": "key"}, {"limit": "5", "apikey": "key"}]
+
+
+def test_empty_and_failed_responses_are_not_cached():
+    client = FmpApiClient("key")
+    responses = iter([
+        httpx.Response(200, json=[]),
+        httpx.Response(404),
+        httpx.Response(200, content=b"<html>maintenance</html>"),
+        httpx.Response(200, json=[{"symbol": "AAPL"}]),
+    ])
+
+    results = _request(client, lambda request: next(responses), *[("profile/AAPL", None)] * 5)
+
+    # The fifth call is answered from the cache without touching the exhausted transport.
+    assert results == [[], None, None, [{"symbol": "AAPL"}], [{"symbol": "AAPL"}]]
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+
+import http_session
+from http_session import create_session, fetch_json
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    recorded = []
+
+    async def sleep(delay):
+        recorded.append(delay)
+    monkeypatch.setattr(http_session.asyncio, "sleep", sleep)
+    return recorded
+
+
+def _fetch(outcomes, **kwargs):
+    """Runs fetch_json against a transport that replays outcomes (responses or exceptions) in order."""
+    attempts = []
+
+    def handler(request):
+        outcome = outcomes[len(attempts)]
+        attempts.append(request)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            return await fetch_json(session, "GET", "https://example.test/data", **kwargs)
+    return asyncio.run(run()), len(attempts)
+
+
+def test_retries_server_errors_with_exponential_backoff(delays):
+    result, attempts = _fetch([httpx.Response(503), httpx.Response(429), httpx.Response(200, json={"ok": 1})])
+    assert result == {"ok": 1}
+    assert attempts == 3
+    assert delays == pytest.approx([0.3, 0.6])
+
+
+def test_gives_up_after_the_last_retry(delays):
+    with pytest.raises(httpx.HTTPStatusError) as excinfo:
+        _fetch([httpx.Response(502)] * 3, retries=2)
+    assert excinfo.value.response.status_code == 502
+    assert delays == pytest.approx([0.3, 0.6])
+
+
+def test_client_errors_are_not_retried(delays):
+    with pytest.raises(httpx.HTTPStatusError):
+        _fetch([httpx.Response(404)])
+    assert delays == []
+
+
+def test_retries_failed_connections(delays):
+    result, attempts = _fetch([httpx.ConnectError("refused"), httpx.ConnectTimeout("slow"),
+                               httpx.Response(200, json=[1])])
+    assert (result, attempts) == ([1], 3)
+
+    with pytest.raises(httpx.ConnectError):
+        _fetch([httpx.ConnectError("refused")] * 2, retries=1)
+
+
+def test_read_timeouts_are_not_retried(delays):
+    # Only connection failures are retried; a timeout waiting for the response is raised.
+    with pytest.raises(httpx.ReadTimeout):
+        _fetch([httpx.ReadTimeout("slow"), httpx.Response(200, json=[1])])
+    assert delays == []
+
+
+def test_decodes_json_and_maps_empty_bodies_to_none(delays):
+    assert _fetch([httpx.Response(200, content=b'{"a": [1, 2]}')])[0] == {"a": [1, 2]}
+    assert _fetch([httpx.Response(200)])[0] is None
+    with pytest.raises(ValueError):
+        _fetch([httpx.Response(200, content=b"<html></html>")])
+
+
+def test_create_session_sets_explicit_timeouts():
+    async def run():
+        async with create_session() as session:
+            return session.timeout
+    timeout = asyncio.run(run())
+    assert (timeout.connect, timeout.read) == (3.0, 10.0)
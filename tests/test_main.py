@@ -0,0 +1,171 @@
+import asyncio
+import gzip
+import threading
+
+import httpx
+import orjson
+import pytest
+
+import main
+
+INCOME = [{"calendarYear": y, "ebitda": 500, "depreciationAndAmortization": 100,
+           "incomeTaxExpense": 80, "incomeBeforeTax": 400} for y in ("2024", "2023")]
+BALANCE = [{"calendarYear": y, "netReceivables": r, "inventory": 50, "accountPayables": 30}
+           for y, r in (("2024", 120), ("2023", 100))]
+CASH_FLOW = [{"calendarYear": y, "capitalExpenditure": -40} for y in ("2024", "2023")]
+
+
+def fmp_handler(request, statements_ok=True):
+    path = request.url.path.removeprefix("/api/v3/")
+    if path.startswith(("income-statement", "balance-sheet-statement", "cash-flow-statement")) and not statements_ok:
+        return httpx.Response(200, content=b"<html>maintenance</html>")
+    responses = {
+        "income-statement": INCOME,
+        "balance-sheet-statement": BALANCE,
+        "cash-flow-statement": CASH_FLOW,
+        "key-metrics": [{"peRatio": 12}],
+        "profile": [{"companyName": "Example Corp"}],
+        "enterprise-values": [{"enterpriseValue": 10000, "addTotalDebt": 500, "minusCashAndCashEquivalents": 200}],
+    }
+    for prefix, payload in responses.items():
+        if path.startswith(prefix):
+            return httpx.Response(200, json=payload)
+    # quote and stock_news are unavailable
+    return httpx.Response(404)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    main.fmp_client.cache_clear()
+    main.sec_client.cache_clear()
+
+
+def _analyze(monkeypatch, handler):
+    # The app opens (and later closes) its shared client through create_session.
+    clients = []
+
+    def create_session():
+        clients.append(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        return clients[-1]
+    monkeypatch.setattr(main, "create_session", create_session)
+
+    async def run():
+        async with main.app.test_app() as test_app:
+            response = await test_app.test_client().get("/analyze/exmp")
+            return response.status_code, await response.get_json()
+    result = asyncio.run(run())
+    assert len(clients) == 1 and clients[0].is_closed
+    return result
+
+
+def test_failed_sources_fall_back_to_empty_defaults(monkeypatch):
+    def handler(request):
+        if request.url.host == "api.sec-api.io":
+            raise RuntimeError("SEC search unavailable")
+        return fmp_handler(request)
+
+    status, body = _analyze(monkeypatch, handler)
+
+    assert status == 200
+    assert body["companyName"] == "Example Corp"
+    business_quality = body["pillars"]["business_quality"]
+    assert business_quality["sec_filings"] == {"10-K": "#", "10-Q": "#"}
+    assert business_quality["key_metrics"] == [{"peRatio": 12}]
+    assert [row["year"] for row in business_quality["reclassified_cash_flow_analysis"]] == [2024]
+    assert body["pillars"]["contrarian_analysis"]["market_data"] == {}
+    assert body["pillars"]["contrarian_analysis"]["news_sentiment"]["summary"]["total_articles"] == 0
+    # Only the placeholder catalysts remain without filings.
+    assert [g["id"] for g in body["pillars"]["catalysts"]["guideposts"]] == ["op1", "fin1"]
+
+
+def test_missing_financial_statements_return_500(monkeypatch):
+    def handler(request):
+        if request.url.host == "api.sec-api.io":
+            return httpx.Response(200, json={"filings": []})
+        return fmp_handler(request, statements_ok=False)
+
+    status, body = _analyze(monkeypatch, handler)
+
+    assert status == 500
+    assert body == {"error": "Failed to retrieve complete financial data for EXMP from FMP."}
+
+
+def _after_request(body, accept_encoding=None, mimetype="application/json", headers=None):
+    request_headers = {"Accept-Encoding": accept_encoding} if accept_encoding is not None else {}
+
+    async def run():
+        async with main.app.test_request_context("/analyze/exmp", headers=request_headers):
+            response = main.app.response_class(body, mimetype=mimetype, headers=headers)
+            response = await main.gzip_response(response)
+            return response, await response.get_data()
+    return asyncio.run(run())
+
+
+LARGE_JSON = b'{"payload": "' + b"x" * 2000 + b'"}'
+
+
+def test_gzip_compresses_large_json_off_the_event_loop(monkeypatch):
+    compress_threads = []
+    compress = gzip.compress
+
+    def recording_compress(*args, **kwargs):
+        compress_threads.append(threading.get_ident())
+        return compress(*args, **kwargs)
+    monkeypatch.setattr(gzip, "compress", recording_compress)
+
+    response, data = _after_request(LARGE_JSON, "deflate, gzip;q=0.8")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert gzip.decompress(data) == LARGE_JSON
+    assert compress_threads and compress_threads[0] != threading.get_ident()
+
+
+def test_gzip_respects_refused_encodings():
+    for accept_encoding in ("gzip;q=0", "br", ""):
+        response, data = _after_request(LARGE_JSON, accept_encoding)
+        assert "Content-Encoding" not in response.headers
+        assert data == LARGE_JSON
+        # The response could have been compressed for another client.
+        assert "Accept-Encoding" in response.vary
+
+
+def test_gzip_skips_ineligible_responses():
+    cases = [
+        _after_request(b'{"ok": true}', "gzip"),
+        _after_request(b"x" * 2000, "gzip", mimetype="text/plain"),
+        _after_request(LARGE_JSON, "gzip", headers={"Content-Encoding": "br"}),
+    ]
+    for response, data in cases:
+        assert response.headers.get("Content-Encoding") in (None, "br")
+        assert "Accept-Encoding" not in response.vary
+        assert not data.startswith(b"\x1f\x8b")
+
+
+def _jsonify(*args, **kwargs):
+    async def run():
+        async with main.app.app_context():
+            response = main.jsonify(*args, **kwargs)
+            return response, await response.get_data()
+    return asyncio.run(run())
+
+
+def test_orjson_provider_encodes_responses():
+    response, data = _jsonify({2024: {"nopat": 320}, "tuple": (1, 2), "text": "caf\u00e9"})
+
+    assert response.mimetype == "application/json"
+    assert response.status_code == 200
+    # Integer keys, such as the per-year maps, are encoded as strings.
+    assert orjson.loads(data) == {"2024": {"nopat": 320}, "tuple": [1, 2], "text": "caf\u00e9"}
+
+
+def test_orjson_provider_accepts_jsonify_call_forms():
+    assert orjson.loads(_jsonify(error="missing")[1]) == {"error": "missing"}
+    assert orjson.loads(_jsonify(1, 2)[1]) == [1, 2]
+    assert orjson.loads(_jsonify()[1]) is None
+
+
+def test_orjson_provider_round_trips_dumps_and_loads():
+    provider = main.app.json
+    assert provider.loads(provider.dumps({1: [1.5, None]})) == {"1": [1.5, None]}
+    assert provider.loads(b'{"a": 1}') == {"a": 1}
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import httpx
+
+from sec_client import SecApiClient
+
+
+def _run_batch(client, handler, tickers):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            return await client.get_latest_filings_batch(session, tickers)
+    return asyncio.run(run())
+
+
+def test_batch_partitions_filings_per_ticker():
+    queries = []
+
+    def handler(request):
+        query = json.loads(request.content)["query"]["query_string"]["query"]
+        queries.append(query)
+        if query.startswith("ticker:AAA "):
+            # A heavy Form 4 filer must not crowd the other ticker out of its results.
+            filings = [{"ticker": "AAA", "formType": "4", "id": str(i)} for i in range(20)]
+        else:
+            filings = [{"ticker": "BBB", "formType": "10-K", "id": "k"},
+                       {"ticker": "BBB", "formType": "8-K", "id": "ignored"}]
+        return httpx.Response(200, json={"filings": filings})
+
+    result = _run_batch(SecApiClient("key"), handler, ["AAA", "BBB", "AAA"])
+
+    # One query per distinct ticker, each with its own result window.
+    assert sorted(q.split()[0] for q in queries) == ["ticker:AAA", "ticker:BBB"]
+    assert len(result["AAA"]["4"]) == 20
+    assert result["BBB"] == {"10-K": [{"ticker": "BBB", "formType": "10-K", "id": "k"}],
+                             "10-Q": [], "4": [], "SC 13D": []}
+
+
+def test_batch_serves_cached_tickers_and_skips_failures():
+    client = SecApiClient("key")
+    requested = []
+
+    def handler(request):
+        query = json.loads(request.content)["query"]["query_string"]["query"]
+        requested.append(query.split()[0])
+        if query.startswith("ticker:BAD "):
+            return httpx.Response(404)
+        return httpx.Response(200, json={"filings": [{"ticker": "AAA", "formType": "10-Q"}]})
+
+    first = _run_batch(client, handler, ["AAA", "BAD"])
+    second = _run_batch(client, handler, ["AAA", "BAD"])
+
+    assert "BAD" not in first and "BAD" not in second
+    assert first["AAA"] == second["AAA"]
+    # AAA comes from the cache the second time; the failed ticker is retried.
+    assert sorted(requested) == ["ticker:AAA", "ticker:BAD", "ticker:BAD"]
+
+
+def test_batch_does_not_cache_empty_or_malformed_bodies():
+    client = SecApiClient("key")
+    responses = iter([
+        httpx.Response(200),
+        httpx.Response(200, json=[]),
+        httpx.Response(200, json={"filings": []}),
+    ])
+
+    def handler(request):
+        return next(responses)
+
+    assert _run_batch(client, handler, ["AAA"]) == {}
+    assert _run_batch(client, handler, ["AAA"]) == {}
+    # A real response with no filings is a valid answer and is cached.
+    empty_buckets = {"10-K": [], "10-Q": [], "4": [], "SC 13D": []}
+    assert _run_batch(client, handler, ["AAA"]) == {"AAA": empty_buckets}
+    assert _run_batch(client, handler, ["AAA"]) == {"AAA": empty_buckets}